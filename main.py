@@ -1,66 +1,464 @@
 import os
-import json
+import sys
 import time
-import requests
+import queue
+import logging
+import hashlib
+import sqlite3
+import asyncio
+import threading
+import httpx
+import orjson
+from logging.handlers import QueueHandler, QueueListener
 from google import genai
 
+# Optional: embedding model for the semantic response cache. The system
+# works fine without it, just without cross-run prompt caching.
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Optional: tokenizer for trimming prompt history to a token budget;
+# without it a chars/4 estimate is used instead
+try:
+    import tiktoken
+    _ENCODER = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODER = None
+
+# Retry policy for Groq calls: transient statuses retried with exponential
+# backoff, everything else non-2xx raises
+_GROQ_MAX_RETRIES = 5
+_GROQ_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _count_tokens(text):
+    """Token count via tiktoken when available, else a chars/4 estimate"""
+    if _ENCODER is not None:
+        return len(_ENCODER.encode(text))
+    return len(text) // 4
+
+
+# Invariant prompt text lives here as frozen module-level constants: built
+# once at import, never re-interpolated, and guaranteed byte-stable across
+# calls (no accidental whitespace drift to break provider prefix caching).
+# Only the small volatile fields go through format_map.
+_GEMINI_PREAMBLE = (
+    "You are Agent 1 (Gemini 2.5 Pro), working collaboratively with "
+    "Agent 2 (Deepseek Llama 70B).\n\n"
+    "Your specialties are:\n"
+    "- Creative thinking and ideation\n"
+    "- Structured planning\n"
+    "- Considering multiple perspectives"
+)
+_GROQ_PREAMBLE = (
+    "You are Agent 2 (Deepseek Llama 70B), working collaboratively with "
+    "Agent 1 (Gemini 2.5 Pro).\n\n"
+    "Your specialties are:\n"
+    "- Detailed analysis and implementation\n"
+    "- Technical precision\n"
+    "- Pragmatic refinement of ideas"
+)
+_GEMINI_INIT_TMPL = _GEMINI_PREAMBLE + (
+    '\n\nTASK: "{task}"\n\n'
+    "Begin by introducing yourself to Agent 2 and outline your initial "
+    "thoughts on how to approach this task.\n"
+    "Focus on the big picture and strategic elements."
+)
+_GROQ_INIT_TMPL = _GROQ_PREAMBLE + (
+    '\n\nTASK: "{task}"\n\n'
+    "Wait for Agent 1's initial thoughts, then respond with your "
+    "specialized perspective.\n"
+    "Feel free to build on their ideas while adding your technical insights."
+)
+_FOLLOW_UP_TMPL = (
+    '\n\nTASK: "{task}"\n\n'
+    "HISTORY:\n{history}\n\n"
+    "TURN: {turn} of {max_turns}.\n\n"
+    "{instruction}\n\n"
+    "Be concise but insightful. Advance the solution forward meaningfully."
+)
+
+# Process-wide Gemini clients, one per API key, so every AIAgentSystem in
+# the process shares one client (and its warm HTTP connection pool) instead
+# of paying connection setup per instance
+_GEMINI_CLIENTS = {}
+
+
+def _shared_gemini_client(api_key):
+    """Return the singleton Gemini client for this API key"""
+    if api_key not in _GEMINI_CLIENTS:
+        _GEMINI_CLIENTS[api_key] = genai.Client(
+            api_key=api_key,
+            http_options=genai.types.HttpOptions(api_version="v1")
+        )
+    return _GEMINI_CLIENTS[api_key]
+
+
+class SemanticCache:
+    """Embedding-based response cache shared by both agents.
+
+    The prompt templates have long fixed skeletons (role descriptions, task
+    string), so exact or paraphrased prompts recur across runs. Cached
+    responses are matched on cosine similarity of a MiniLM embedding and
+    persisted to SQLite so repeat runs skip the provider round trip entirely.
+    """
+
+    def __init__(self, path="llm_semantic_cache.sqlite", similarity=0.95, ttl=86400):
+        self.enabled = SentenceTransformer is not None
+        if not self.enabled:
+            return
+        self.model = SentenceTransformer("all-MiniLM-L6-v2")
+        self.similarity = similarity
+        self.ttl = ttl
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS cache (model TEXT, embedding BLOB, response TEXT, ts INTEGER)"
+        )
+        self.db.commit()
+
+    def get(self, model, prompt):
+        """Return a cached response whose prompt is similar enough, or None"""
+        if not self.enabled:
+            return None
+        import numpy as np
+
+        embedding = self.model.encode(prompt).astype("float32")
+        cutoff = int(time.time()) - self.ttl
+        best_response, best_similarity = None, 0.0
+        for blob, response in self.db.execute(
+            "SELECT embedding, response FROM cache WHERE model=? AND ts>?",
+            (model, cutoff)
+        ):
+            cached = np.frombuffer(blob, dtype=np.float32)
+            similarity = float(
+                np.dot(embedding, cached)
+                / (np.linalg.norm(embedding) * np.linalg.norm(cached))
+            )
+            if similarity > best_similarity:
+                best_response, best_similarity = response, similarity
+        return best_response if best_similarity >= self.similarity else None
+
+    def put(self, model, prompt, response):
+        """Store a fresh provider response under the prompt's embedding"""
+        if not self.enabled:
+            return
+        embedding = self.model.encode(prompt).astype("float32")
+        self.db.execute(
+            "INSERT INTO cache VALUES (?, ?, ?, ?)",
+            (model, embedding.tobytes(), response, int(time.time()))
+        )
+        self.db.commit()
+
 class AIAgentSystem:
     def __init__(self, gemini_api_key=None, groq_api_key=None):
         # Initialize API keys
         self.gemini_api_key = gemini_api_key or os.environ.get("GEMINI_API_KEY")
         self.groq_api_key = groq_api_key or os.environ.get("GROQ_API_KEY")
         
-        # Set up Gemini
-        self.gemini_client = genai.Client(api_key=self.gemini_api_key)
+        # Set up Gemini (client shared process-wide per API key)
+        self.gemini_client = _shared_gemini_client(self.gemini_api_key)
         self.gemini_model = "gemini-2.0-flash"
         
         # Set up Groq API endpoint (instead of using the client library)
         self.groq_api_url = "https://api.groq.com/openai/v1/chat/completions"
         self.groq_model = "deepseek-r1-distill-llama-70b"
         
-        # Conversation history
+        # Conversation history, plus pre-formatted lines so prompts don't
+        # reformat the whole (growing) conversation every turn
         self.conversation = []
-        
-    def gemini_agent(self, prompt):
-        """Agent 1: Gemini model"""
-        try:
-            response = self.gemini_client.models.generate_content(
-                model=self.gemini_model, 
-                contents=prompt
-            )
-            return response.text
-        except Exception as e:
-            return f"Gemini Agent Error: {str(e)}"
-    
-    def groq_agent(self, prompt):
-        """Agent 2: Groq model using direct API calls instead of the client library"""
-        try:
-            headers = {
+        self._history_lines = []
+
+        # Status logging goes through a queue drained by a background
+        # thread, so multi-KB writes to stdout never block the network
+        # critical path; full agent responses are logged at DEBUG. Only the
+        # instance that installs the handler owns a listener, and close()
+        # stops it, flushing any records still queued.
+        self.logger = logging.getLogger("a2a")
+        self._log_listener = None
+        self._log_handler = None
+        if not self.logger.handlers:
+            log_queue = queue.Queue(-1)
+            self._log_listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+            self._log_listener.start()
+            self._log_handler = QueueHandler(log_queue)
+            self.logger.addHandler(self._log_handler)
+        self.logger.setLevel(logging.INFO)
+
+        # In-flight background result writes, joined in close() so their
+        # log records aren't lost when the listener stops
+        self._save_threads = []
+
+        # Follow-up prompts carry only the last _history_window turns
+        # verbatim; older turns are folded into a rolling summary so prompt
+        # tokens stay O(window) instead of growing with the conversation
+        self._rolling_summary = ""
+        self._history_window = 2
+        self._folded_upto = 0
+
+        # Hard token budget for the history block of a prompt, so input size
+        # can never creep toward the model's context wall even when single
+        # responses are very long
+        self._history_token_budget = 3000
+
+        # HTTP/2 client for Groq calls, kept alive so all turns multiplex
+        # over one warm TLS connection
+        self.http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60, connect=5),
+            limits=httpx.Limits(max_keepalive_connections=8),
+            headers={
                 "Authorization": f"Bearer {self.groq_api_key}",
                 "Content-Type": "application/json"
             }
-            
-            payload = {
-                "model": self.groq_model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.6,
-                "max_tokens": 4096,
-                "top_p": 0.95
-            }
-            
-            response = requests.post(self.groq_api_url, headers=headers, json=payload)
-            response_data = response.json()
-            
-            if 'choices' in response_data and len(response_data['choices']) > 0:
-                return response_data['choices'][0]['message']['content']
-            else:
-                return f"Groq Agent Error: Unexpected response format - {response_data}"
-                
-        except Exception as e:
-            return f"Groq Agent Error: {str(e)}"
+        )
+
+        # Semantic cache in front of both agents (no-op if the embedding
+        # model isn't installed)
+        self.semantic_cache = SemanticCache()
+
+        # Exact-match cache for deterministic prompts (temperature 0), keyed
+        # on SHA256(model + prompt) and persisted across runs
+        self.cache = sqlite3.connect("llm_cache.sqlite", check_same_thread=False)
+        self.cache.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, model TEXT, response TEXT, ts INTEGER)"
+        )
+        self.cache.commit()
+        self.cache_ttl = 86400
+
+    def _exact_cache_get(self, model, prompt):
+        """Look up a prompt in the exact-match cache, honouring the TTL"""
+        key = hashlib.sha256((model + "\x00" + prompt).encode()).hexdigest()
+        row = self.cache.execute(
+            "SELECT response FROM cache WHERE key=? AND ts>?",
+            (key, int(time.time()) - self.cache_ttl)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _exact_cache_put(self, model, prompt, response):
+        """Store a response in the exact-match cache"""
+        key = hashlib.sha256((model + "\x00" + prompt).encode()).hexdigest()
+        self.cache.execute(
+            "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+            (key, model, response, int(time.time()))
+        )
+        self.cache.commit()
+
+    def gemini_agent(self, prompt, cacheable=False, semantic=False, echo=False):
+        """Agent 1: Gemini model, consumed as a stream
+
+        Set cacheable=True only for deterministic prompts (e.g. the
+        conversation-length estimate) so repeated runs skip the API call.
+        semantic=True additionally opts the prompt into the cross-run
+        semantic cache; it must stay off for follow-up turns, whose prompts
+        are near-identical turn to turn and would match each other.
+        With echo=True chunks are printed live as they arrive. API failures
+        propagate to the caller rather than being returned as text, so an
+        error string never ends up recorded as a conversation turn.
+        """
+        if cacheable:
+            cached = self._exact_cache_get(self.gemini_model, prompt)
+            if cached is not None:
+                return cached
+        if semantic:
+            cached = self.semantic_cache.get(self.gemini_model, prompt)
+            if cached is not None:
+                return cached
+        chunks = []
+        for chunk in self.gemini_client.models.generate_content_stream(
+            model=self.gemini_model,
+            contents=prompt
+        ):
+            if chunk.text:
+                if echo:
+                    print(chunk.text, end="", flush=True)
+                chunks.append(chunk.text)
+        text = "".join(chunks)
+        if cacheable:
+            self._exact_cache_put(self.gemini_model, prompt, text)
+        if semantic:
+            self.semantic_cache.put(self.gemini_model, prompt, text)
+        return text
+
+    async def _gemini_async(self, prompt, cacheable=False, semantic=False, echo=False):
+        """Run the (blocking) Gemini client call without blocking the event loop"""
+        return await asyncio.to_thread(self.gemini_agent, prompt, cacheable, semantic, echo)
+
+    async def groq_agent(self, prompt, temperature=0.6, semantic=False, echo=False):
+        """Agent 2: Groq model using direct API calls instead of the client library
+
+        Responses are streamed over SSE and accumulated; with echo=True the
+        deltas are printed live. Responses are exact-cached only at
+        temperature 0, where the output is deterministic for a given prompt.
+        semantic=True opts the prompt into the cross-run semantic cache and
+        must stay off for follow-up turns (their prompts are near-identical
+        turn to turn and would match each other).
+
+        429/5xx responses are retried with exponential backoff (honouring
+        Retry-After); anything else non-2xx raises RuntimeError so the
+        caller can stop rather than record an error string as a turn.
+        """
+        if temperature == 0:
+            cached = self._exact_cache_get(self.groq_model, prompt)
+            if cached is not None:
+                return cached
+        if semantic:
+            # Embedding + similarity scan are CPU-bound; keep them off the
+            # event loop so concurrent turn calls stay concurrent
+            cached = await asyncio.to_thread(
+                self.semantic_cache.get, self.groq_model, prompt
+            )
+            if cached is not None:
+                return cached
+        payload = {
+            "model": self.groq_model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": 4096,
+            "top_p": 0.95,
+            "stream": True
+        }
+
+        parts = None
+        for attempt in range(_GROQ_MAX_RETRIES):
+            async with self.http.stream(
+                "POST", self.groq_api_url, content=orjson.dumps(payload)
+            ) as response:
+                if response.status_code in _GROQ_RETRY_STATUSES:
+                    await response.aread()
+                    if attempt + 1 == _GROQ_MAX_RETRIES:
+                        # No attempts left — don't sleep just to raise
+                        break
+                    try:
+                        # Retry-After may also be an HTTP-date (RFC 9110);
+                        # fall back to exponential backoff if not numeric
+                        delay = float(response.headers.get("Retry-After"))
+                    except (TypeError, ValueError):
+                        delay = 0.5 * 2 ** attempt
+                    self.logger.warning(
+                        f"Groq returned {response.status_code}, retrying in {delay:.1f}s "
+                        f"(attempt {attempt + 1}/{_GROQ_MAX_RETRIES})"
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise RuntimeError(
+                        f"Groq API error {response.status_code}: {body.decode('utf-8', 'replace')}"
+                    )
+
+                # Parse the "data: {json}" SSE frames, accumulating the deltas
+                parts = []
+                async for line in response.aiter_lines():
+                    line = line.strip()
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    delta = orjson.loads(data)['choices'][0]['delta'].get('content')
+                    if delta:
+                        if echo:
+                            print(delta, end="", flush=True)
+                        parts.append(delta)
+            if parts is not None:
+                break
+
+        if parts is None:
+            raise RuntimeError(
+                f"Groq API still rate-limited/unavailable after {_GROQ_MAX_RETRIES} attempts"
+            )
+
+        content = "".join(parts)
+        if temperature == 0:
+            self._exact_cache_put(self.groq_model, prompt, content)
+        if semantic:
+            await asyncio.to_thread(
+                self.semantic_cache.put, self.groq_model, prompt, content
+            )
+        return content
+
+    async def close(self):
+        """Close the shared HTTP client and flush background work"""
+        await self.http.aclose()
+        # Join pending result writes first so their log records are queued
+        # before the listener drains and stops
+        for thread in self._save_threads:
+            await asyncio.to_thread(thread.join)
+        self._save_threads.clear()
+        if self._log_listener is not None:
+            self.logger.removeHandler(self._log_handler)
+            self._log_listener.stop()
+            self._log_listener = None
+            self._log_handler = None
     
-    def determine_conversation_length(self, task):
-        """Determine how many turns the agents should converse based on task complexity"""
+    def _record(self, agent, message):
+        """Append a message to the conversation and its formatted history line"""
+        self.conversation.append(message)
+        self._history_lines.append(f"{agent}: {message}")
+
+    def _windowed_history_text(self):
+        """History for follow-up prompts: rolling summary + recent turns verbatim
+
+        The verbatim window is additionally trimmed newest-first to the
+        token budget (minus what the rolling summary already uses), so the
+        history block stays bounded even with very long individual turns.
+        """
+        budget = self._history_token_budget - _count_tokens(self._rolling_summary)
+        kept = []
+        for line in reversed(self._history_lines[-2 * self._history_window:]):
+            cost = _count_tokens(line)
+            if kept and cost > budget:
+                break
+            budget -= cost
+            kept.append(line)
+        recent = "\n\n".join(reversed(kept))
+        if not self._rolling_summary:
+            return recent
+        return (
+            f"Summary of earlier discussion:\n{self._rolling_summary}"
+            f"\n\nRecent turns:\n{recent}"
+        )
+
+    async def _fold_into_summary(self, evicted_lines):
+        """Fold turns leaving the verbatim window into the rolling summary"""
+        evicted_text = "\n\n".join(evicted_lines)
+        fold_prompt = f"""
+        Update the running summary of a conversation between two AI agents.
+        Keep every decision, concrete idea and open question; stay under 200 words.
+
+        Current summary:
+        {self._rolling_summary or "(none yet)"}
+
+        New turns to incorporate:
+        {evicted_text}
+
+        Return only the updated summary.
+        """
+        try:
+            self._rolling_summary = await self._gemini_async(fold_prompt)
+        except Exception as e:
+            # A lost fold only costs context, not correctness: keep the
+            # previous summary rather than aborting the run
+            self.logger.warning(f"Summary fold failed, keeping previous summary: {e}")
+
+    def determine_conversation_length(self, task, use_llm_router=False):
+        """Determine how many turns the agents should converse based on task complexity
+
+        The default is a zero-cost local heuristic on task length and
+        complexity keywords — the estimate only picks a number between 3 and
+        10, which doesn't justify a provider round trip. Pass
+        use_llm_router=True to keep the original Gemini-based estimate.
+        """
+        if not use_llm_router:
+            words = len(task.split())
+            complex_kw = sum(
+                kw in task.lower()
+                for kw in ("design", "plan", "compare", "analy", "optim", "architect")
+            )
+            return min(10, max(3, 3 + words // 40 + complex_kw))
+
         prompt = f"""
         You are tasked with determining the optimal number of conversation turns needed for two AI agents 
         to solve this task: "{task}"
@@ -73,7 +471,7 @@ class AIAgentSystem:
         Return only a number between 3 and 10 representing the optimal number of turns.
         """
         
-        response = self.gemini_agent(prompt)
+        response = self.gemini_agent(prompt, cacheable=True, semantic=True)
         try:
             turns = int(response.strip())
             return max(3, min(10, turns))  # Ensure between 3-10 turns
@@ -82,75 +480,37 @@ class AIAgentSystem:
     
     def generate_initial_prompts(self, task):
         """Generate initial specialized prompts for each agent"""
-        gemini_prompt = f"""
-        You are Agent 1 (Gemini 2.5 Pro), working collaboratively with Agent 2 (Deepseek Llama 70B) on this task:
-        "{task}"
-        
-        Your specialties are:
-        - Creative thinking and ideation
-        - Structured planning
-        - Considering multiple perspectives
-        
-        Begin by introducing yourself to Agent 2 and outline your initial thoughts on how to approach this task.
-        Focus on the big picture and strategic elements.
-        """
-        
-        groq_prompt = f"""
-        You are Agent 2 (Deepseek Llama 70B), working collaboratively with Agent 1 (Gemini 2.5 Pro) on this task:
-        "{task}"
-        
-        Your specialties are:
-        - Detailed analysis and implementation
-        - Technical precision
-        - Pragmatic refinement of ideas
-        
-        Wait for Agent 1's initial thoughts, then respond with your specialized perspective.
-        Feel free to build on their ideas while adding your technical insights.
-        """
-        
-        return gemini_prompt, groq_prompt
+        fields = {"task": task}
+        return _GEMINI_INIT_TMPL.format_map(fields), _GROQ_INIT_TMPL.format_map(fields)
     
-    def generate_follow_up_prompts(self, conversation_history, turn_number, max_turns, task):
+    def generate_follow_up_prompts(self, turn_number, max_turns, task):
         """Generate follow-up prompts for continuing the conversation"""
-        
-        # Convert conversation history to a readable format for the models
-        history_text = "\n\n".join([f"{'Agent 1 (Gemini)' if i%2==0 else 'Agent 2 (Deepseek)'}: {msg}" for i, msg in enumerate(conversation_history)])
-        
-        gemini_prompt = f"""
-        You are Agent 1 (Gemini 2.5 Pro). Review the conversation so far about the task: "{task}"
-        
-        Conversation history:
-        {history_text}
-        
-        This is turn {turn_number} of {max_turns}.
-        
-        {'As this is the final turn, work with Agent 2 to conclude and present a final solution or recommendation.' 
-          if turn_number == max_turns else 
-         'Continue the collaborative discussion, building on what has been shared so far.'}
-        
-        Be concise but insightful. Advance the solution forward meaningfully.
-        """
-        
-        groq_prompt = f"""
-        You are Agent 2 (Deepseek Llama 70B). Review the conversation so far about the task: "{task}"
-        
-        Conversation history:
-        {history_text}
-        
-        This is turn {turn_number} of {max_turns}.
-        
-        {'As this is the final turn, work with Agent 1 to conclude and present a final solution or recommendation.' 
-          if turn_number == max_turns else 
-         'Continue the collaborative discussion, building on what has been shared so far.'}
-        
-        Be concise but insightful. Advance the solution forward meaningfully.
-        """
-        
-        return gemini_prompt, groq_prompt
+
+        # Rolling summary plus the last few turns verbatim keeps prompt
+        # tokens bounded regardless of conversation length
+        history_text = self._windowed_history_text()
+
+        # One shared suffix for both agents: built once (no duplicate string
+        # work) and byte-identical, so provider prefix caches treat both
+        # prompts the same past the role preamble
+        instruction = (
+            'As this is the final turn, work with the other agent to conclude and present a final solution or recommendation.'
+            if turn_number == max_turns else
+            'Continue the collaborative discussion, building on what has been shared so far.'
+        )
+        common = _FOLLOW_UP_TMPL.format_map({
+            "task": task,
+            "history": history_text,
+            "turn": turn_number,
+            "max_turns": max_turns,
+            "instruction": instruction
+        })
+
+        return _GEMINI_PREAMBLE + common, _GROQ_PREAMBLE + common
     
-    def generate_summary(self, task, conversation):
+    def generate_summary(self, task):
         """Generate a summary of the collaboration and final output"""
-        history_text = "\n\n".join([f"{'Agent 1 (Gemini)' if i%2==0 else 'Agent 2 (Deepseek)'}: {msg}" for i, msg in enumerate(conversation)])
+        history_text = "\n\n".join(self._history_lines)
         
         summary_prompt = f"""
         Review this conversation between two AI agents collaborating on the task: "{task}"
@@ -168,60 +528,114 @@ class AIAgentSystem:
         
         return self.gemini_agent(summary_prompt)
     
-    def collaborate(self, task):
-        """Main function to run the collaborative process"""
-        print(f"📋 Task: {task}\n")
-        print("🔄 Determining optimal conversation length...")
-        max_turns = self.determine_conversation_length(task)
-        print(f"✅ Decided on {max_turns} turns of conversation\n")
-        print("🤖 Beginning agent collaboration...\n")
-        
+    async def collaborate_stream(self, task):
+        """Run the collaborative process, yielding turns as they complete
+
+        Yields ("gemini" | "groq" | "summary", turn_number, text) tuples so
+        consumers (a web UI, an incremental renderer) can start on early
+        turns while later ones are still in flight, instead of waiting for
+        the whole conversation to finish.
+        """
+        self.logger.info(f"📋 Task: {task}\n")
+        self.logger.info("🤖 Beginning agent collaboration...\n")
+
         # Initial prompts
         gemini_prompt, groq_prompt = self.generate_initial_prompts(task)
-        
+
+        # The length estimate only decides the loop bound, so it runs
+        # concurrently with the opening exchange instead of delaying it by
+        # a full round trip
+        self.logger.info("🔄 Determining optimal conversation length...")
+        length_task = asyncio.create_task(
+            asyncio.to_thread(self.determine_conversation_length, task)
+        )
+
         # First agent starts
-        print("🔵 Agent 1 (Gemini 2.5 Pro) thinking...")
-        gemini_response = self.gemini_agent(gemini_prompt)
-        self.conversation.append(gemini_response)
-        print(f"🔵 Agent 1 (Gemini): {gemini_response}\n")
-        
+        # The two opening calls are sequential (Agent 2 needs Agent 1's
+        # output), so stream them live to the console as they arrive
+        print("🔵 Agent 1 (Gemini): ", end="", flush=True)
+        gemini_response = await self._gemini_async(gemini_prompt, semantic=True, echo=True)
+        self._record("Agent 1 (Gemini)", gemini_response)
+        print("\n")
+        yield ("gemini", 1, gemini_response)
+
         # Second agent responds
-        print("🟠 Agent 2 (Deepseek Llama 70B) thinking...")
-        groq_response = self.groq_agent(groq_prompt + "\n\nAgent 1 said: " + gemini_response)
-        self.conversation.append(groq_response)
-        print(f"🟠 Agent 2 (Deepseek): {groq_response}\n")
-        
+        print("🟠 Agent 2 (Deepseek): ", end="", flush=True)
+        groq_response = await self.groq_agent(groq_prompt + "\n\nAgent 1 said: " + gemini_response, semantic=True, echo=True)
+        self._record("Agent 2 (Deepseek)", groq_response)
+        print("\n")
+        yield ("groq", 1, groq_response)
+
+        # The estimate has been overlapping the opening exchange; settle the
+        # loop bound before turn 2
+        max_turns = await length_task
+        self.logger.info(f"✅ Decided on {max_turns} turns of conversation\n")
+
         # Continue the conversation for the determined number of turns
         for turn in range(2, max_turns + 1):
-            print(f"--- Turn {turn}/{max_turns} ---\n")
-            
+            self.logger.info(f"--- Turn {turn}/{max_turns} ---\n")
+
             # Generate follow-up prompts
             gemini_prompt, groq_prompt = self.generate_follow_up_prompts(
-                self.conversation, turn, max_turns, task
+                turn, max_turns, task
             )
-            
-            # Gemini agent's turn
-            print("🔵 Agent 1 (Gemini 2.5 Pro) thinking...")
-            gemini_response = self.gemini_agent(gemini_prompt)
-            self.conversation.append(gemini_response)
-            print(f"🔵 Agent 1 (Gemini): {gemini_response}\n")
-            
-            # Groq agent's turn
-            print("🟠 Agent 2 (Deepseek Llama 70B) thinking...")
-            groq_response = self.groq_agent(groq_prompt)
-            self.conversation.append(groq_response)
-            print(f"🟠 Agent 2 (Deepseek): {groq_response}\n")
+
+            # Fold the turns that will leave the verbatim window after this
+            # turn into the rolling summary, overlapped with the agents' calls
+            # (this turn's prompts still carry those lines verbatim)
+            fold_task = None
+            fold_upto = len(self._history_lines) + 2 - 2 * self._history_window
+            if fold_upto > self._folded_upto:
+                evicted = self._history_lines[self._folded_upto:fold_upto]
+                self._folded_upto = fold_upto
+                fold_task = asyncio.create_task(self._fold_into_summary(evicted))
+
+            # Both follow-up prompts only depend on the history up to the
+            # previous turn, so the two provider calls can run concurrently
+            self.logger.info("🔵 Agent 1 (Gemini 2.5 Pro) and 🟠 Agent 2 (Deepseek Llama 70B) thinking...")
+            try:
+                gemini_response, groq_response = await asyncio.gather(
+                    self._gemini_async(gemini_prompt),
+                    self.groq_agent(groq_prompt)
+                )
+            except Exception as e:
+                # Stop rather than record an error as a turn — it would be
+                # re-embedded in every later prompt and break cache hits
+                self.logger.error(f"⚠️ Provider error on turn {turn}, ending conversation early: {e}")
+                if fold_task is not None:
+                    await fold_task
+                break
+            if fold_task is not None:
+                await fold_task
+
+            self._record("Agent 1 (Gemini)", gemini_response)
+            self.logger.debug(f"🔵 Agent 1 (Gemini): {gemini_response}\n")
+            yield ("gemini", turn, gemini_response)
+
+            self._record("Agent 2 (Deepseek)", groq_response)
+            self.logger.debug(f"🟠 Agent 2 (Deepseek): {groq_response}\n")
+            yield ("groq", turn, groq_response)
         
         # Generate final summary
-        print("🔄 Generating final summary and output...")
-        summary = self.generate_summary(task, self.conversation)
-        print("\n📊 FINAL OUTPUT:\n")
-        print(summary)
-        
-        # Return results
+        self.logger.info("🔄 Generating final summary and output...")
+        summary = self.generate_summary(task)
+        self.logger.info("\n📊 FINAL OUTPUT:\n")
+        self.logger.info(summary)
+        yield ("summary", max_turns, summary)
+
+    async def collaborate(self, task):
+        """Compatibility wrapper: drain collaborate_stream into a result dict"""
+        summary = ""
+        turns_completed = 0
+        async for agent, turn, text in self.collaborate_stream(task):
+            if agent == "summary":
+                summary = text
+            else:
+                turns_completed = max(turns_completed, turn)
+
         return {
             "task": task,
-            "conversation_turns": max_turns,
+            "conversation_turns": turns_completed,
             "conversation": self.conversation,
             "summary": summary
         }
@@ -232,10 +646,21 @@ class AIAgentSystem:
             timestamp = time.strftime("%Y%m%d-%H%M%S")
             filename = f"ai_collaboration_{timestamp}.json"
         
-        with open(filename, 'w') as f:
-            json.dump(results, f, indent=2)
-        
-        print(f"\n💾 Results saved to {filename}")
+        # orjson serializes at native speed; the disk write happens on a
+        # background thread so the caller isn't blocked on I/O
+        data = orjson.dumps(results, option=orjson.OPT_INDENT_2)
+
+        def _write():
+            with open(filename, 'wb') as f:
+                f.write(data)
+            self.logger.info(f"\n💾 Results saved to {filename}")
+
+        # Non-daemon so an exiting interpreter still waits for the write;
+        # close() joins it so the completion message isn't lost
+        thread = threading.Thread(target=_write)
+        thread.start()
+        self._save_threads.append(thread)
+        return thread
 
 # Example usage
 if __name__ == "__main__":
@@ -254,10 +679,16 @@ if __name__ == "__main__":
         # User task
         user_task = input("Enter task for AI agents to collaborate on: ")
         
-        # Run collaboration
-        results = system.collaborate(user_task)
-        
-        # Save results
-        system.save_results(results)
+        # Run collaboration and save results before close() flushes the
+        # log listener and joins the writer thread
+        async def run():
+            try:
+                results = await system.collaborate(user_task)
+                system.save_results(results)
+                return results
+            finally:
+                await system.close()
+
+        results = asyncio.run(run())
     except Exception as e:
         print(f"Error: {str(e)}")
\ No newline at end of file